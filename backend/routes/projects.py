@@ -1,5 +1,5 @@
 from fastapi import APIRouter, HTTPException, status
-from typing import List
+from typing import List, Optional
 from models.Project import Project, ProjectCreate, ProjectUpdate, ProjectResponse, Host, Container
 from services.ProjectService import ProjectService
 
@@ -27,6 +27,21 @@ async def get_projects(include_archived: bool = False):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch projects: {str(e)}")
 
+@router.get("/changes", response_model=dict)
+async def get_changes(since: int = 0, limit: int = 500, after: Optional[str] = None, project_id: Optional[str] = None):
+    """Get projects, hosts, containers and deletions changed after a revision"""
+    try:
+        page = service.get_changes(since, limit, after, project_id)
+        if page is None:
+            raise HTTPException(status_code=404, detail="Project not found")
+        return page
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch changes: {str(e)}")
+
 @router.get("/{project_id}", response_model=dict)
 async def get_project(project_id: str):
     """Get a specific project by ID"""
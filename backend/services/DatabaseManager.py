@@ -66,6 +66,12 @@ class DatabaseManager:
             "CREATE CONSTRAINT project_id IF NOT EXISTS FOR (p:Project) REQUIRE p.id IS UNIQUE",
             "CREATE CONSTRAINT host_ip IF NOT EXISTS FOR (h:Host) REQUIRE h.ip IS UNIQUE",
             "CREATE CONSTRAINT container_id IF NOT EXISTS FOR (c:Container) REQUIRE c.id IS UNIQUE",
+            "CREATE CONSTRAINT change_counter_id IF NOT EXISTS FOR (rc:ChangeCounter) REQUIRE rc.id IS UNIQUE",
+            "CREATE CONSTRAINT tombstone_key IF NOT EXISTS FOR (t:Tombstone) REQUIRE (t.kind, t.key) IS UNIQUE",
+            "CREATE INDEX project_rev IF NOT EXISTS FOR (p:Project) ON (p.rev)",
+            "CREATE INDEX host_rev IF NOT EXISTS FOR (h:Host) ON (h.rev)",
+            "CREATE INDEX container_rev IF NOT EXISTS FOR (c:Container) ON (c.rev)",
+            "CREATE INDEX tombstone_rev IF NOT EXISTS FOR (t:Tombstone) ON (t.rev)",
         ]
         for s in statements:
             try:
@@ -6,10 +6,74 @@ from services.DatabaseManager import DatabaseManager
 
 _VALID_EVENT_TYPES = {"CVI", "CVPA"}
 
+# Prefix for every write: bumps the global change counter and binds the new
+# value as `rev`. The counter node stays write-locked until the transaction
+# commits, so revisions become visible in the order they were handed out.
+_NEXT_REV = """
+MERGE (rc:ChangeCounter {id:'global'})
+SET rc._lock = true
+WITH rc
+SET rc.rev = coalesce(rc.rev, 0) + 1
+REMOVE rc._lock
+WITH rc.rev AS rev
+"""
+
+# (kind, node pattern, pattern scoped to $pid, extra scoped filter, key within kind)
+_CHANGE_SOURCES = (
+    ("project", "(n:Project)", "(n:Project {id:$pid})", "", "n.id"),
+    ("host", "(n:Host)", "(:Project {id:$pid})-[:HAS_HOST]->(n:Host)", "", "n.ip"),
+    ("container", "(n:Container)",
+     "(:Project {id:$pid})-[:HAS_HOST]->(:Host)-[:RUNS]->(n:Container)", "", "n.id"),
+    ("deleted", "(n:Tombstone)", "(n:Tombstone)", " AND $pid IN n.projectIds", "n.kind + ':' + n.key"),
+)
+
+_MAX_CHANGES_PAGE = 1000
+
+def _changes_cypher(scoped: bool) -> str:
+    # Rows are ordered by (rev, sortKey); a page resumes strictly after the
+    # (since, after) pair, so one large revision can span several pages.
+    branches = []
+    for kind, pattern, scoped_pattern, scoped_filter, key in _CHANGE_SOURCES:
+        match, extra = (scoped_pattern, scoped_filter) if scoped else (pattern, "")
+        branches.append(
+            f"MATCH {match} WHERE n.rev >= $since AND n.rev <= $until{extra} "
+            f"WITH DISTINCT n, '{kind}|' + {key} AS sortKey "
+            f"WHERE n.rev > $since OR sortKey > $after "
+            f"RETURN '{kind}' AS kind, n AS node, n.rev AS rev, sortKey "
+            f"ORDER BY rev, sortKey LIMIT $limit"
+        )
+    # Hosts are shared between projects, so each host row carries the ids of
+    # every project it currently belongs to.
+    return (
+        "CALL {\n" + "\nUNION ALL\n".join(branches) + "\n}\n"
+        "WITH kind, node, rev, sortKey ORDER BY rev, sortKey LIMIT $limit\n"
+        "OPTIONAL MATCH (p:Project)-[:HAS_HOST]->(node) WHERE kind = 'host'\n"
+        "RETURN kind, node, rev, sortKey, collect(p.id) AS projectIds ORDER BY rev, sortKey"
+    )
+
 class ProjectService:
     def __init__(self):
         self.db = DatabaseManager()
         self.db.ensure_constraints()
+        self._backfill_revisions()
+
+    def _backfill_revisions(self) -> None:
+        """Stamp nodes written before revisions existed with a single fresh
+        revision, once per database, so that since=0 covers the whole graph."""
+        done = self.db.executeRead("MATCH (rc:ChangeCounter {id:'global'}) RETURN rc.backfilled AS done")
+        if done and done[0]["done"]:
+            return
+        cypher = _NEXT_REV + """
+        MATCH (rc:ChangeCounter {id:'global'})
+        SET rc.backfilled = true
+        WITH rev
+        OPTIONAL MATCH (n)
+        WHERE (n:Project OR n:Host OR n:Container) AND n.rev IS NULL
+        WITH rev, collect(n) AS nodes
+        FOREACH (x IN nodes | SET x.rev = rev)
+        RETURN size(nodes) AS stamped
+        """
+        self.db.executeWrite(cypher)
 
     def create_project(self, project: Project) -> Dict[str, Any]:
         if project.eventType not in _VALID_EVENT_TYPES:
@@ -18,14 +82,18 @@ class ProjectService:
         key = f"{project.name}|{project.analystInitials}|{project.startDate}|{project.endDate}|{project.eventType}"
         project.id = str(uuid.uuid5(uuid.NAMESPACE_DNS, key))
 
-        cypher = """
+        cypher = _NEXT_REV + """
         MERGE (p:Project {id: $id})
         SET p.name = $name,
             p.analystInitials = $analystInitials,
             p.startDate = $startDate,
             p.endDate = $endDate,
             p.eventType = $eventType,
-            p.archived = coalesce(p.archived, false)
+            p.archived = coalesce(p.archived, false),
+            p.rev = rev
+        WITH p
+        OPTIONAL MATCH (t:Tombstone {kind:'project', key:p.id})
+        DELETE t
         RETURN p
         """
         params = {
@@ -88,8 +156,9 @@ class ProjectService:
         
         if not set_clauses:
             return self.get_project_by_id(project_id)
-        
-        cypher = f"""
+
+        set_clauses.append("p.rev = rev")
+        cypher = _NEXT_REV + f"""
         MATCH (p:Project {{id:$id}})
         SET {", ".join(set_clauses)}
         RETURN p
@@ -99,32 +168,54 @@ class ProjectService:
         return result[0]["p"] if result else None
 
     def delete_project(self, project_id: str) -> bool:
-        cypher = """
+        cypher = _NEXT_REV + """
         MATCH (p:Project {id:$id})
-        OPTIONAL MATCH (p)-[:HAS_HOST]->(h:Host)-[:RUNS]->(c:Container)
-        DETACH DELETE p, h, c
+        OPTIONAL MATCH (p)-[:HAS_HOST]->(h:Host)
+        OPTIONAL MATCH (h)-[:RUNS]->(c:Container)
+        WITH rev, p, collect(DISTINCT h) AS hosts, collect(DISTINCT c) AS containers
+        WITH rev, p, hosts, containers,
+             [x IN hosts WHERE EXISTS { (x)-[:RUNS]->(:Container) }] AS doomed,
+             [x IN hosts WHERE NOT EXISTS { (x)-[:RUNS]->(:Container) }] AS kept
+        MERGE (tp:Tombstone {kind:'project', key:p.id})
+        SET tp.rev = rev, tp.projectIds = [p.id]
+        FOREACH (x IN doomed |
+          MERGE (t:Tombstone {kind:'host', key:x.ip})
+          SET t.rev = rev, t.projectIds = [(o:Project)-[:HAS_HOST]->(x) | o.id])
+        FOREACH (x IN containers |
+          MERGE (t:Tombstone {kind:'container', key:x.id})
+          SET t.rev = rev, t.projectIds = [(o:Project)-[:HAS_HOST]->(:Host)-[:RUNS]->(x) | o.id])
+        FOREACH (x IN hosts | FOREACH (o IN [(o:Project)-[:HAS_HOST]->(x) WHERE o <> p | o] | SET o.rev = rev))
+        FOREACH (x IN kept | SET x.rev = rev)
+        FOREACH (x IN containers | DETACH DELETE x)
+        FOREACH (x IN doomed | DETACH DELETE x)
+        DETACH DELETE p
         RETURN count(p) as deleted
         """
         res = self.db.executeQuery(cypher, {"id": project_id})
         return res[0]["deleted"] > 0 if res else False
 
     def archive_project(self, project_id: str) -> bool:
-        cypher = "MATCH (p:Project {id:$id}) SET p.archived=true RETURN p"
+        cypher = _NEXT_REV + "MATCH (p:Project {id:$id}) SET p.archived=true, p.rev=rev RETURN p"
         res = self.db.executeQuery(cypher, {"id": project_id})
         return bool(res)
 
     def restore_project(self, project_id: str) -> bool:
-        cypher = "MATCH (p:Project {id:$id}) SET p.archived=false RETURN p"
+        cypher = _NEXT_REV + "MATCH (p:Project {id:$id}) SET p.archived=false, p.rev=rev RETURN p"
         res = self.db.executeQuery(cypher, {"id": project_id})
         return bool(res)
 
     def export_project(self, project_id: str) -> str:
+        # The counter is read before the graph, so `revision` never runs ahead
+        # of the exported nodes; replaying changes from it at worst repeats a write.
         cypher = """
+        OPTIONAL MATCH (rc:ChangeCounter {id:'global'})
+        WITH coalesce(rc.rev, 0) AS revision
         MATCH (p:Project {id:$id})
         OPTIONAL MATCH (p)-[:HAS_HOST]->(h:Host)
         OPTIONAL MATCH (h)-[:RUNS]->(c:Container)
-        WITH p, collect(DISTINCT h) AS hosts, collect(DISTINCT c) AS containers
+        WITH revision, p, collect(DISTINCT h) AS hosts, collect(DISTINCT c) AS containers
         RETURN {
+          revision: revision,
           project: p,
           hosts: [h IN hosts | h],
           containers: [c IN containers | c]
@@ -143,14 +234,18 @@ class ProjectService:
         if p["eventType"] not in _VALID_EVENT_TYPES:
             raise ValueError("Invalid event type in payload")
 
-        cy_project = """
+        cy_project = _NEXT_REV + """
         MERGE (p:Project {id:$id})
         SET p.name=$name,
             p.analystInitials=$analystInitials,
             p.startDate=$startDate,
             p.endDate=$endDate,
             p.eventType=$eventType,
-            p.archived=coalesce($archived,false)
+            p.archived=coalesce($archived,false),
+            p.rev=rev
+        WITH p
+        OPTIONAL MATCH (t:Tombstone {kind:'project', key:p.id})
+        DELETE t
         RETURN p
         """
         project_params = {
@@ -184,12 +279,17 @@ class ProjectService:
         return {"status": "ok", "projectId": p["id"]}
 
     def add_host_to_project(self, project_id: str, host: Host):
-        cypher = """
+        cypher = _NEXT_REV + """
         MATCH (p:Project {id:$pid})
         MERGE (h:Host {ip: toString($ip)})
           ON CREATE SET h.port = $port, h.openPorts = $openPorts
           ON MATCH  SET h.port = coalesce($port, h.port)
         MERGE (p)-[:HAS_HOST]->(h)
+        SET h.rev = rev
+        FOREACH (o IN [(o:Project)-[:HAS_HOST]->(h) | o] | SET o.rev = rev)
+        WITH p, h
+        OPTIONAL MATCH (t:Tombstone {kind:'host', key:h.ip})
+        DELETE t
         RETURN p,h
         """
         params = {
@@ -201,15 +301,21 @@ class ProjectService:
         return self.db.executeQuery(cypher, params)
 
     def add_container_to_host(self, host_ip: str, container: Container):
-        cypher = """
+        cypher = _NEXT_REV + """
         MATCH (h:Host {ip: toString($host_ip)})
         MERGE (c:Container {id:$id})
         SET c.name=$name,
             c.image=$image,
             c.version=$version,
             c.openPorts=$openPorts,
-            c.hostIp=$host_ip
+            c.hostIp=$host_ip,
+            c.rev=rev
         MERGE (h)-[:RUNS]->(c)
+        SET h.rev = rev
+        FOREACH (o IN [(o:Project)-[:HAS_HOST]->(:Host)-[:RUNS]->(c) | o] | SET o.rev = rev)
+        WITH h, c
+        OPTIONAL MATCH (t:Tombstone {kind:'container', key:c.id})
+        DELETE t
         RETURN h,c
         """
         params = {
@@ -243,4 +349,74 @@ class ProjectService:
         RETURN c
         """
         results = self.db.executeQuery(cypher, {"ip": str(host_ip)})
-        return [r.get("c", {}) for r in results]
\ No newline at end of file
+        return [r.get("c", {}) for r in results]
+
+    def get_changes(
+        self,
+        since: int = 0,
+        limit: int = 500,
+        after: Optional[str] = None,
+        project_id: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Return projects, hosts and containers stamped after revision `since`,
+        plus tombstones for deletions, oldest first. since=0 returns the full
+        current state. Resume with the returned (nextSince, nextAfter) pair.
+        With `project_id`, only that project's subtree is returned, and an
+        unchanged project is answered from its own `rev` alone. Returns None
+        for a project that never existed."""
+        if since < 0:
+            raise ValueError("since must be >= 0")
+        if not 1 <= limit <= _MAX_CHANGES_PAGE:
+            raise ValueError(f"limit must be between 1 and {_MAX_CHANGES_PAGE}")
+
+        if project_id is None:
+            head = self.db.executeRead("MATCH (rc:ChangeCounter {id:'global'}) RETURN rc.rev AS rev")
+            current = (head[0]["rev"] or 0) if head else 0
+            latest = current
+        else:
+            head = self.db.executeRead("""
+            OPTIONAL MATCH (rc:ChangeCounter {id:'global'})
+            OPTIONAL MATCH (p:Project {id:$pid})
+            OPTIONAL MATCH (t:Tombstone {kind:'project', key:$pid})
+            RETURN rc.rev AS rev, p.rev AS projectRev, t.rev AS tombstoneRev,
+                   p IS NOT NULL OR t IS NOT NULL AS known
+            """, {"pid": project_id})
+            if not head or not head[0]["known"]:
+                return None
+            current = head[0]["rev"] or 0
+            latest = max(head[0]["projectRev"] or 0, head[0]["tombstoneRev"] or 0)
+
+        page: Dict[str, Any] = {
+            "projectId": project_id,
+            "since": since,
+            "after": after,
+            "revision": current,
+            "nextSince": max(since, current),
+            "nextAfter": None,
+            "hasMore": False,
+            "projects": [],
+            "hosts": [],
+            "containers": [],
+            "deleted": [],
+        }
+        if latest < since or (latest == since and after is None):
+            return page
+
+        params = {"since": since, "until": current, "after": after, "limit": limit + 1, "pid": project_id}
+        rows = self.db.executeRead(_changes_cypher(scoped=project_id is not None), params)
+        if len(rows) > limit:
+            rows = rows[:limit]
+            page["hasMore"] = True
+            page["nextSince"] = rows[-1]["rev"]
+            page["nextAfter"] = rows[-1]["sortKey"]
+
+        for r in rows:
+            node = r.get("node", {})
+            if r["kind"] == "deleted":
+                page["deleted"].append({"kind": node.get("kind"), "key": node.get("key"), "rev": r["rev"]})
+            elif r["kind"] == "host":
+                node["projectIds"] = r.get("projectIds", [])
+                page["hosts"].append(node)
+            else:
+                page[f"{r['kind']}s"].append(node)
+        return page
@@ -1,5 +1,5 @@
 import axios from 'axios';
-import type { Project, ProjectCreate, ProjectUpdate, Host, Container, ApiResponse } from '$lib/types';
+import type { Project, ProjectCreate, ProjectUpdate, Host, Container, ApiResponse, ChangesPage } from '$lib/types';
 
 const API_BASE_URL = 'http://localhost:8000';
 
@@ -18,6 +18,18 @@ export const projectApi = {
     return response.data;
   },
 
+  getChanges: async (
+    since = 0,
+    limit = 500,
+    after: string | null = null,
+    projectId: string | null = null,
+  ): Promise<ChangesPage> => {
+    const response = await api.get<ChangesPage>('/api/projects/changes', {
+      params: { since, limit, after: after ?? undefined, project_id: projectId ?? undefined },
+    });
+    return response.data;
+  },
+
   getById: async (id: string): Promise<Project> => {
     const response = await api.get<Project>(`/api/projects/${id}`);
     return response.data;
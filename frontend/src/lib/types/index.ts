@@ -9,6 +9,7 @@ export interface Project {
   eventType: EventType;
   archived: boolean;
   hostCount?: number;
+  rev?: number;
 }
 
 export interface ProjectCreate {
@@ -32,6 +33,8 @@ export interface Host {
   port?: number;
   openPorts: number[];
   containers?: Container[];
+  projectIds?: string[];
+  rev?: number;
 }
 
 export interface Container {
@@ -41,6 +44,27 @@ export interface Container {
   version?: string;
   hostIp?: string;
   openPorts: number[];
+  rev?: number;
+}
+
+export interface Tombstone {
+  kind: 'project' | 'host' | 'container';
+  key: string;
+  rev: number;
+}
+
+export interface ChangesPage {
+  projectId: string | null;
+  since: number;
+  after: string | null;
+  revision: number;
+  nextSince: number;
+  nextAfter: string | null;
+  hasMore: boolean;
+  projects: Project[];
+  hosts: Host[];
+  containers: Container[];
+  deleted: Tombstone[];
 }
 
 export interface ApiResponse<T = any> {